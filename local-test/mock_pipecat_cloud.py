@@ -1,13 +1,20 @@
 import asyncio
+import json
 import os
 import uuid
-from typing import Any, Dict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict
 
 import aiohttp
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from loguru import logger
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from whatsapp_request_handler import (
     WhatsAppCallEventType,
     WhatsAppRequestHandler,
@@ -17,7 +24,35 @@ from whatsapp_request_handler import (
 # Load environment variables from a .env file
 load_dotenv()
 
-app = FastAPI()
+
+# Maximum number of proxied requests in flight to the bot at once
+MAX_OUTBOUND = int(os.getenv("MAX_OUTBOUND", "32"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share a single HTTP client session (and its connection pool) across all requests."""
+    # Strong references to running bot tasks so they are not garbage collected mid-flight
+    app.state.bg_tasks = set()
+    # Long-running /bot calls each hold a connection for the whole session, so the connector
+    # itself is unbounded and proxied requests are limited by outbound_sem instead.
+    app.state.http = aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=60),
+        connector=aiohttp.TCPConnector(limit=0, keepalive_timeout=75),
+    )
+    app.state.outbound_sem = asyncio.Semaphore(MAX_OUTBOUND)
+    try:
+        yield
+    finally:
+        tasks = list(app.state.bg_tasks)
+        for task in tasks:
+            task.cancel()
+        # Let the bot calls unwind before the session they are using is closed
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await app.state.http.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS for local development
 app.add_middleware(
@@ -28,11 +63,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Sessions that never complete (crashes, missed terminate events) are evicted after the
+# same 2 hour window used for the long-running /bot request.
+SESSION_TTL_SECONDS = 7200
+MAX_SESSIONS = 10_000
+
 # In-memory store of active sessions: session_id -> session info
-active_sessions: Dict[str, Dict[str, Any]] = {}
+active_sessions: TTLCache[str, Dict[str, Any]] = TTLCache(
+    maxsize=MAX_SESSIONS, ttl=SESSION_TTL_SECONDS
+)
 
 # Mapping between WhatsApp call_id and session_id
-whatsapp_call_sessions: Dict[str, str] = {}
+whatsapp_call_sessions: TTLCache[str, str] = TTLCache(maxsize=MAX_SESSIONS, ttl=SESSION_TTL_SECONDS)
+
+# Sessions someone is waiting on: session_id -> event set once stored in active_sessions
+pending_sessions: Dict[str, asyncio.Event] = {}
 
 # Read environment variables
 LOCAL_POD_IP = os.getenv("LOCAL_POD_IP")
@@ -41,6 +86,9 @@ DAILY_ROOM_URL = os.getenv("DAILY_SAMPLE_ROOM_URL")
 DAILY_TOKEN = os.getenv("DAILY_SAMPLE_TOKEN")
 # This will be the PCC public API key
 WHATSAPP_WEBHOOK_VERIFICATION_TOKEN = os.getenv("WHATSAPP_WEBHOOK_VERIFICATION_TOKEN")
+WHATSAPP_WEBHOOK_VERIFICATION_TOKEN_BYTES = (
+    WHATSAPP_WEBHOOK_VERIFICATION_TOKEN.encode() if WHATSAPP_WEBHOOK_VERIFICATION_TOKEN else None
+)
 
 
 async def call_bot_and_store(agent_name: str, session_id: str, body: dict):
@@ -60,63 +108,157 @@ async def call_bot_and_store(agent_name: str, session_id: str, body: dict):
         headers["x-daily-transport-type"] = body.get("transport")
 
     # Store session info immediately in memory
-    active_sessions[session_id] = {
+    session_info = {
         "agent_name": agent_name,
         "pod_ip_address": LOCAL_POD_IP,
         "pod_ip_port": LOCAL_POD_PORT,
+        "base_url": f"http://{LOCAL_POD_IP}:{LOCAL_POD_PORT}",
     }
+    active_sessions[session_id] = session_info
+    ready = pending_sessions.pop(session_id, None)
+    if ready:
+        ready.set()
 
-    target_host = active_sessions[session_id]["pod_ip_address"]
-    target_port = active_sessions[session_id]["pod_ip_port"]
-    bot_url = f"http://{target_host}:{target_port}/bot"
-    bot_body = body.get("body", {})
+    bot_url = f"{session_info['base_url']}/bot"
+    # Only the nested "body" is forwarded, so it has to be re-encoded (orjson keeps that cheap)
+    bot_body = orjson.dumps(body.get("body", {}))
+    headers["content-type"] = "application/json"
 
     # Long-running request to local bot server
-    timeout = aiohttp.ClientTimeout(total=7200)  # 2 hours
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        async with session.post(bot_url, headers=headers, json=bot_body) as resp:
-            if resp.status != 200:
-                raise HTTPException(status_code=500, detail="Failed to start bot")
-            await resp.json()
-            logger.info(f"Bot with session_id {session_id} has finished executing")
-            del active_sessions[session_id]
-
-
-async def wait_for_bot_start(
-    session_id: str, max_wait_time: int = 2, check_interval: float = 0.5
-) -> bool:
+    timeout = aiohttp.ClientTimeout(total=SESSION_TTL_SECONDS)  # 2 hours
+    async with app.state.http.post(
+        bot_url, headers=headers, data=bot_body, timeout=timeout
+    ) as resp:
+        if resp.status != 200:
+            raise HTTPException(status_code=500, detail="Failed to start bot")
+        await resp.read()
+        logger.info(f"Bot with session_id {session_id} has finished executing")
+        # The entry may already have been evicted by the TTL cache
+        active_sessions.pop(session_id, None)
+
+
+def start_bot_task(agent_name: str, session_id: str, body: dict) -> None:
+    """Run call_bot_and_store in the background without tying it to a request."""
+    task = asyncio.create_task(call_bot_and_store(agent_name, session_id, body))
+    app.state.bg_tasks.add(task)
+
+    def on_done(task: asyncio.Task) -> None:
+        app.state.bg_tasks.discard(task)
+        # A finished bot already removed its session; a failed or cancelled one hasn't
+        active_sessions.pop(session_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Bot session {session_id} failed: {task.exception()!r}")
+
+    task.add_done_callback(on_done)
+
+
+async def wait_for_bot_start(session_id: str, ready: asyncio.Event, max_wait_time: int = 2) -> bool:
     """
     Wait for a bot session to be stored in active_sessions.
-    """
-    waited_time = 0
 
-    while session_id not in active_sessions and waited_time < max_wait_time:
-        logger.debug("waiting for session_id to be stored in active_sessions...")
-        await asyncio.sleep(check_interval)
-        waited_time += check_interval
-
-    if session_id in active_sessions:
-        logger.info(f"Session {session_id} confirmed in active_sessions after {waited_time:.1f}s")
-        return True
-    else:
+    `ready` must be registered in pending_sessions before the bot task is started.
+    """
+    try:
+        await asyncio.wait_for(ready.wait(), timeout=max_wait_time)
+    except asyncio.TimeoutError:
+        pending_sessions.pop(session_id, None)
         logger.error(f"Timeout waiting for session {session_id} to be stored in active_sessions")
         return False
 
+    logger.info(f"Session {session_id} confirmed in active_sessions")
+    return True
+
+
+# Only these headers are copied between the client and the bot. Connection-level headers
+# (host, content-length, transfer-encoding, ...) are left for each hop to set itself.
+FORWARD_REQUEST_HEADERS = frozenset(
+    {
+        "accept",
+        "authorization",
+        "content-type",
+        "user-agent",
+        "x-forwarded-for",
+        "x-hub-signature-256",
+        "x-request-id",
+    }
+)
+FORWARD_RESPONSE_HEADERS = frozenset({"content-type", "cache-control", "etag"})
+PROXY_CHUNK_SIZE = 64 * 1024
+
+
+def forward_request_headers(request: Request, session_id: str) -> Dict[str, str]:
+    """Build the headers sent to the bot for a proxied request."""
+    # Starlette already lower-cases incoming header names
+    headers = {k: v for k, v in request.headers.items() if k in FORWARD_REQUEST_HEADERS}
+    headers["x-daily-session-id"] = session_id
+    return headers
+
+
+def has_request_body(request: Request) -> bool:
+    """Whether the incoming request carries a body that should be forwarded."""
+    content_length = request.headers.get("content-length")
+    return (content_length is not None and content_length != "0") or (
+        "transfer-encoding" in request.headers
+    )
+
+
+async def iter_upstream_body(resp: aiohttp.ClientResponse, release: Callable[[], None]):
+    """Yield the upstream response body in chunks, calling `release` when done."""
+    try:
+        async for chunk in resp.content.iter_chunked(PROXY_CHUNK_SIZE):
+            yield chunk
+    finally:
+        release()
+
+
+async def proxy_to_bot(request: Request, method: str, url: str, **kwargs) -> StreamingResponse:
+    """Send a request to the bot and relay its response without buffering it in memory.
+
+    An outbound permit is held until the response body has been relayed, not just until the
+    upstream headers arrive, so outbound_sem bounds the number of bodies being streamed.
+    """
+    sem: asyncio.Semaphore = request.app.state.outbound_sem
+    await sem.acquire()
+    resp = None
+    try:
+        resp = await request.app.state.http.request(method, url, **kwargs)
+    finally:
+        if resp is None:
+            sem.release()
+
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            resp.release()
+            sem.release()
+
+    headers = {k: v for k, v in resp.headers.items() if k.lower() in FORWARD_RESPONSE_HEADERS}
+    return StreamingResponse(
+        iter_upstream_body(resp, release),
+        status_code=resp.status,
+        headers=headers,
+        # Covers responses whose body is never iterated, e.g. when the client goes away early
+        background=BackgroundTask(release),
+    )
+
 
 @app.post("/v1/public/{agent_name}/start")
-async def start_agent(agent_name: str, request: Request, background_tasks: BackgroundTasks):
+async def start_agent(agent_name: str, request: Request):
     """
     Endpoint to start a new agent session.
     """
     try:
-        body = await request.json()
-    except Exception:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
         body = {}  # Default to empty dict if request body is not JSON
 
     session_id = str(uuid.uuid4())
 
     # Schedule bot execution in the background
-    background_tasks.add_task(call_bot_and_store, agent_name, session_id, body)
+    start_bot_task(agent_name, session_id, body)
 
     return {"sessionId": session_id}
 
@@ -133,34 +275,23 @@ async def proxy_request(agent_name: str, session_id: str, path: str, request: Re
     if not active_session:
         return Response(content="Invalid or not-yet-ready session_id", status_code=404)
 
-    target_url = f"http://{active_session['pod_ip_address']}:{active_session['pod_ip_port']}/{path}"
+    target_url = f"{active_session['base_url']}/{path}"
 
-    headers = dict(request.headers)
-    headers["x-daily-session-id"] = session_id
-    body = await request.body()
-
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
-        async with session.request(
-            request.method,
-            target_url,
-            headers=headers,
-            data=body if body else None,
-        ) as resp:
-            response_body = await resp.read()
-            return Response(
-                content=response_body,
-                status_code=resp.status,
-                headers=dict(resp.headers),
-            )
+    headers = forward_request_headers(request, session_id)
+
+    return await proxy_to_bot(
+        request,
+        request.method,
+        target_url,
+        headers=headers,
+        data=request.stream() if has_request_body(request) else None,
+    )
 
 
 ## Mocking the ice-servers endpoint which will be provided by the sidecar.
-@app.get("/ice-servers")
-async def get_ice_config():
-    """
-    Endpoint to get ice servers configuration.
-    """
-    ice_config_result = {
+# The configuration never changes, so it is serialized once instead of on every request.
+ICE_CONFIG_BODY = json.dumps(
+    {
         "iceConfig": {
             "iceServers": [
                 {
@@ -176,11 +307,43 @@ async def get_ice_config():
             ]
         }
     }
+).encode("utf-8")
+ICE_CONFIG_HEADERS = {"cache-control": "public, max-age=300"}
+
 
-    return ice_config_result
+@app.get("/ice-servers", response_class=Response)
+async def get_ice_config():
+    """
+    Endpoint to get ice servers configuration.
+    """
+    return Response(
+        content=ICE_CONFIG_BODY, media_type="application/json", headers=ICE_CONFIG_HEADERS
+    )
 
 
 # ---------------- WhatsApp specific routes ----------------
+
+
+def document_model(model: type[BaseModel]) -> Dict[str, str]:
+    """Add a model's JSON schema to the OpenAPI components and return a reference to it.
+
+    Nested models are added next to it so their refs resolve from the document root.
+    """
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schemas = schema.pop("$defs", {})
+    schemas[model.__name__] = schema
+    generate_openapi = app.openapi
+
+    def openapi() -> Dict[str, Any]:
+        if app.openapi_schema is None:
+            components = generate_openapi().setdefault("components", {})
+            components.setdefault("schemas", {}).update(schemas)
+        return app.openapi_schema
+
+    app.openapi = openapi
+    return {"$ref": f"#/components/schemas/{model.__name__}"}
+
+
 @app.get(
     "/whatsapp",
     summary="Verify WhatsApp webhook",
@@ -193,12 +356,12 @@ async def verify_webhook(request: Request):
     the webhook URL during setup. It validates the verification token
     and returns the challenge parameter if successful.
     """
-    params = dict(request.query_params)
+    params = request.query_params
     logger.debug(f"Webhook verification request received with params: {list(params.keys())}")
 
     try:
         result = WhatsAppRequestHandler.handle_verify_webhook_request(
-            params=params, expected_token=WHATSAPP_WEBHOOK_VERIFICATION_TOKEN
+            params=params, expected_token=WHATSAPP_WEBHOOK_VERIFICATION_TOKEN_BYTES
         )
         logger.info("Webhook verification successful")
         return result
@@ -211,15 +374,23 @@ async def verify_webhook(request: Request):
     "/whatsapp",
     summary="Handle WhatsApp webhook events",
     description="Processes incoming WhatsApp messages and call events",
+    # The body is parsed by hand, the model is only used to document it
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": document_model(WhatsAppWebhookRequest)}},
+            "required": True,
+        }
+    },
 )
-async def whatsapp_webhook(body: WhatsAppWebhookRequest, request: Request):
+async def whatsapp_webhook(request: Request):
     """Handle incoming WhatsApp webhook events."""
-    logger.debug(f"Incoming WhatsApp webhook: {body.model_dump()}")
-
     original_body = await request.body()
 
     try:
-        call_event = await WhatsAppRequestHandler.handle_webhook_request(body)
+        payload = orjson.loads(original_body)
+        logger.debug(f"Incoming WhatsApp webhook: {payload}")
+
+        call_event = WhatsAppRequestHandler.handle_webhook_payload(payload)
 
         # --- Handle new call ---
         if call_event.event_type == WhatsAppCallEventType.NEW_CALL:
@@ -229,9 +400,11 @@ async def whatsapp_webhook(body: WhatsAppWebhookRequest, request: Request):
             whatsapp_call_sessions[call_event.call_id] = session_id
             logger.info(f"Mapped call_id {call_event.call_id} → session_id {session_id}")
 
-            asyncio.create_task(call_bot_and_store(agent_name, session_id, {}))
+            ready = asyncio.Event()
+            pending_sessions[session_id] = ready
+            start_bot_task(agent_name, session_id, {})
 
-            if not await wait_for_bot_start(session_id):
+            if not await wait_for_bot_start(session_id, ready):
                 raise RuntimeError(f"Bot startup timeout for session {session_id}")
 
         # --- Lookup active session ---
@@ -252,22 +425,12 @@ async def whatsapp_webhook(body: WhatsAppWebhookRequest, request: Request):
                 logger.warning(f"Call {call_event.call_id} not found during termination")
 
         # --- Forward webhook to bot ---
-        target_url = (
-            f"http://{active_session['pod_ip_address']}:{active_session['pod_ip_port']}/whatsapp"
-        )
+        target_url = f"{active_session['base_url']}/whatsapp"
         logger.debug(f"Forwarding webhook to {target_url}")
 
-        headers = dict(request.headers)
-        headers["x-daily-session-id"] = session_id
-        # if "content-type" not in headers:
-        #    headers["content-type"] = "application/json"
+        headers = forward_request_headers(request, session_id)
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
-            async with session.post(target_url, headers=headers, data=original_body) as resp:
-                response_body = await resp.read()
-                return Response(
-                    content=response_body, status_code=resp.status, headers=dict(resp.headers)
-                )
+        return await proxy_to_bot(request, "POST", target_url, headers=headers, data=original_body)
 
     except ValueError as ve:
         logger.warning(f"Invalid webhook request: {ve}")
@@ -283,4 +446,4 @@ async def whatsapp_webhook(body: WhatsAppWebhookRequest, request: Request):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=7860)
+    uvicorn.run(app, host="0.0.0.0", port=7860, loop="uvloop", http="httptools")
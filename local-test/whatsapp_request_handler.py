@@ -9,8 +9,9 @@
 This module handles webhook requests from WhatsApp.
 """
 
+import hmac
 from enum import Enum
-from typing import Dict, Optional, Union
+from typing import Any, Dict, Mapping, Optional, Union
 
 from loguru import logger
 from pydantic import BaseModel, Field
@@ -93,6 +94,13 @@ class WhatsAppCallEventType(Enum):
     TERMINATE_CALL = "TERMINATE_CALL"
 
 
+# Webhook call events we act on, mapped to the event type reported to the caller
+CALL_EVENT_TYPES = {
+    "connect": WhatsAppCallEventType.NEW_CALL,
+    "terminate": WhatsAppCallEventType.TERMINATE_CALL,
+}
+
+
 class WhatsAppCallEvent(BaseModel):
     """Represents a WhatsApp call event."""
 
@@ -107,35 +115,58 @@ class WhatsAppRequestHandler:
     """Static handler for WhatsApp webhook requests."""
 
     @staticmethod
-    def handle_verify_webhook_request(params: Dict[str, str], expected_token: str) -> int:
-        """Handle a verify webhook request from WhatsApp."""
+    def handle_verify_webhook_request(
+        params: Mapping[str, str], expected_token: Optional[bytes]
+    ) -> int:
+        """Handle a verify webhook request from WhatsApp.
+
+        `expected_token` is passed pre-encoded so it is only encoded once, and is compared
+        in constant time.
+        """
         mode = params.get("hub.mode")
         challenge = params.get("hub.challenge")
         token = params.get("hub.verify_token")
 
-        if mode != "subscribe" or not challenge or token != expected_token:
+        if (
+            mode != "subscribe"
+            or not challenge
+            or token is None
+            or expected_token is None
+            or not hmac.compare_digest(token.encode(), expected_token)
+        ):
             raise ValueError("Webhook verification failed")
 
         return int(challenge)
 
     @staticmethod
-    async def handle_webhook_request(request: WhatsAppWebhookRequest) -> WhatsAppCallEvent:
+    def handle_webhook_request(request: WhatsAppWebhookRequest) -> WhatsAppCallEvent:
         """Handle a webhook request from WhatsApp."""
-        for entry in request.entry:
-            for change in entry.changes:
-                for call in change.value.calls:
-                    if call.event == "connect":
-                        logger.debug(f"Processing connect event for call {call.id}")
-                        return WhatsAppCallEvent(
-                            call_id=call.id,
-                            event_type=WhatsAppCallEventType.NEW_CALL,
-                        )
-                    if call.event == "terminate":
-                        logger.debug(f"Processing terminate event for call {call.id}")
-                        return WhatsAppCallEvent(
-                            call_id=call.id,
-                            event_type=WhatsAppCallEventType.TERMINATE_CALL,
-                        )
-
-        logger.warning(f"No supported event found in webhook request: {request}")
-        raise ValueError("No supported event found in webhook request")
+        return WhatsAppRequestHandler.handle_webhook_payload(request.model_dump())
+
+    @staticmethod
+    def handle_webhook_payload(payload: Dict[str, Any]) -> WhatsAppCallEvent:
+        """Handle a decoded webhook payload from WhatsApp.
+
+        Only the call id and event are needed to route the request, so the raw JSON
+        is walked directly instead of being validated into a WhatsAppWebhookRequest.
+        """
+        try:
+            call = next(
+                (
+                    call
+                    for entry in payload["entry"]
+                    for change in entry["changes"]
+                    for call in change["value"]["calls"]
+                    if call["event"] in CALL_EVENT_TYPES
+                ),
+                None,
+            )
+            if call is None:
+                logger.warning(f"No supported event found in webhook request: {payload}")
+                raise ValueError("No supported event found in webhook request")
+            call_id, event = call["id"], call["event"]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed webhook request: {e!r}") from e
+
+        logger.debug(f"Processing {event} event for call {call_id}")
+        return WhatsAppCallEvent(call_id=call_id, event_type=CALL_EVENT_TYPES[event])
@@ -2,19 +2,23 @@
 
 import asyncio
 import base64
+import binascii
+import gc
 import inspect
-import json
 import logging
 import sys
+import time
 from contextlib import asynccontextmanager
 from os import environ
 from typing import Annotated, Callable, List, Optional, Union
 
 import aiohttp
 import bot as bot_module
+import orjson
 from bot import bot
 from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request, WebSocket
-from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
 from fastapi.websockets import WebSocketState
 from feature_manager import FeatureKeys, FeatureManager
 from loguru import logger
@@ -24,7 +28,8 @@ from pipecatcloud.agent import (
     SessionArguments,
     WebSocketSessionArguments,
 )
-from pipecatcloud_system import add_lifespan_to_app, app
+from pipecatcloud_system import add_lifespan_to_app, add_model_schema_to_app, app
+from pydantic import ValidationError
 from waiting_server import Config, WaitingServer
 
 # ------------------------------------------------------------
@@ -64,10 +69,14 @@ if log_features_summary:
     feature_manager.log_features_summary()
 
 server_config = Config(
-    environ.get("SHUTDOWN_TIMEOUT", 7200),
+    float(environ.get("SHUTDOWN_TIMEOUT", 7200)),
     app,
     host="0.0.0.0",
     port=int(environ.get("PORT", 8080)),
+    # Both ship with fastapi[standard]; pin them so a missing extension fails loudly
+    # instead of silently falling back to the pure-Python asyncio loop and h11 parser.
+    loop="uvloop",
+    http="httptools",
 )
 server = WaitingServer(server_config)
 
@@ -79,7 +88,15 @@ session_logger_format = (
 )
 log_level = environ.get("PIPECAT_LOG_LEVEL", "DEBUG").upper()
 logger.remove()
-logger.add(sys.stderr, format=session_logger_format, level=log_level)
+# Tracebacks skip loguru's extended frames and variable dumps, which are slow to build and
+# can leak secrets held in locals.
+logger.add(
+    sys.stderr,
+    format=session_logger_format,
+    level=log_level,
+    backtrace=False,
+    diagnose=False,
+)
 logger.configure(extra={"session_id": "NONE"})
 
 
@@ -107,9 +124,14 @@ async def run_bot(args: SessionArguments, transport_type: Optional[str] = None):
         "session_id": args.session_id,
         "image_version": image_version,
     }
+
+    # Only serialized when INFO is enabled, PIPECAT_LOG_LEVEL may filter these lines out
+    def metadata_json() -> str:
+        return orjson.dumps(metadata).decode()
+
     with logger.contextualize(session_id=args.session_id):
-        logger.info(f"Starting bot session with metadata: {json.dumps(metadata)}")
-        logger.debug(f"Transport type: {transport_type}")
+        logger.opt(lazy=True).info("Starting bot session with metadata: {}", metadata_json)
+        logger.debug("Transport type: {}", transport_type)
 
         session_manager = GLOBALS.get("session_manager")
         if session_manager:
@@ -135,13 +157,25 @@ async def run_bot(args: SessionArguments, transport_type: Optional[str] = None):
         except Exception as e:
             logger.error(f"Exception running bot(): {e}")
         finally:
-            logger.info(f"Stopping bot session with metadata: {json.dumps(metadata)}")
+            logger.opt(lazy=True).info("Stopping bot session with metadata: {}", metadata_json)
             session_manager = GLOBALS.get("session_manager")
             if session_manager:
                 session_manager.complete_session()
                 GLOBALS["pipecat_session_body"] = None
 
 
+@asynccontextmanager
+async def http_session_lifespan(app: FastAPI):
+    """Share a single aiohttp session, and its connection pool, for outgoing requests."""
+    connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        GLOBALS["http_session"] = session
+        try:
+            yield
+        finally:
+            GLOBALS["http_session"] = None
+
+
 # ------------------------------------------------------------
 # Health check routes (Kubernetes probes)
 # ------------------------------------------------------------
@@ -185,12 +219,21 @@ async def livez():
 # ------------------------------------------------------------
 @app.post("/bot")
 async def handle_bot_request(
-    body: dict,
+    request: Request,
     x_daily_room_url: Annotated[str | None, Header()] = None,
     x_daily_room_token: Annotated[str | None, Header()] = None,
     x_daily_session_id: Annotated[str | None, Header()] = None,
     x_daily_transport_type: Annotated[str | None, Header()] = None,
 ):
+    # The body is handed to the bot as a plain dict, so decode it directly rather than
+    # having FastAPI validate (and copy) it through a pydantic `dict` field.
+    try:
+        body = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON body: {e}") from e
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object")
+
     if x_daily_room_url and x_daily_room_token:
         args = DailySessionArguments(
             session_id=x_daily_session_id,
@@ -209,6 +252,22 @@ async def handle_bot_request(
     return {}
 
 
+# Bodies above this size are decoded in a worker thread so large payloads
+# don't stall other connections; smaller ones aren't worth the thread hop.
+WS_BODY_OFFLOAD_THRESHOLD = 4096
+# Larger bodies are ignored rather than decoded, bounding the work a single connect can cause
+MAX_WS_BODY_SIZE = int(environ.get("MAX_WS_BODY_SIZE", 262144))
+
+
+def _decode_ws_body(body: str) -> Optional[dict]:
+    try:
+        # Decode base64 and parse the JSON bytes directly to a dict
+        return orjson.loads(base64.b64decode(body))
+    except (binascii.Error, orjson.JSONDecodeError) as e:
+        logger.error(f"Failed to decode body parameter: {e}")
+        return None
+
+
 @app.websocket("/ws")
 async def handle_websocket(
     ws: WebSocket,
@@ -219,13 +278,16 @@ async def handle_websocket(
 
     decoded_body = None
     if body:
-        try:
-            # Decode base64 and parse as JSON to a dict
-            decoded_bytes = base64.b64decode(body)
-            decoded_string = decoded_bytes.decode("utf-8")
-            decoded_body = json.loads(decoded_string)
-        except (base64.binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
-            logger.error(f"Failed to decode body parameter: {e}")
+        if len(body) > MAX_WS_BODY_SIZE:
+            logger.warning(
+                "Ignoring body parameter of {} bytes, larger than MAX_WS_BODY_SIZE ({})",
+                len(body),
+                MAX_WS_BODY_SIZE,
+            )
+        elif len(body) > WS_BODY_OFFLOAD_THRESHOLD:
+            decoded_body = await asyncio.to_thread(_decode_ws_body, body)
+        else:
+            decoded_body = _decode_ws_body(body)
 
     args = WebSocketSessionArguments(
         session_id=x_daily_session_id,
@@ -261,6 +323,8 @@ def setup_smallwebrtc_routes():
     ESP32_ENABLED = environ.get("ESP32_ENABLED", "False").lower() == "true"
     ESP32_HOST = environ.get("ESP32_HOST", None)
     ICE_CONFIG_URL = environ.get("ICE_CONFIG_URL", "http://localhost:9090/ice-servers")
+    ICE_CONFIG_TTL = float(environ.get("ICE_CONFIG_TTL", 60))
+    MAX_OFFER_BODY_SIZE = int(environ.get("MAX_OFFER_BODY_SIZE", 262144))
 
     logger.debug(f"ESP32_ENABLED: {ESP32_ENABLED}")
     small_webrtc_handler = SmallWebRTCRequestHandler(
@@ -269,46 +333,130 @@ def setup_smallwebrtc_routes():
         host=ESP32_HOST,
     )
 
+    # The sidecar hands out the same configuration for a while, so reuse it across offers
+    # instead of fetching it on every connection.
+    ice_servers_cache: Optional[List[IceServer]] = None
+    ice_servers_cache_time = 0.0
+    # Fetch shared by every caller that misses the cache while it is running
+    ice_servers_inflight: Optional[asyncio.Task] = None
+    # Used when the configuration can't be fetched; built once since it never changes
+    DEFAULT_ICE_SERVERS = [IceServer(urls="stun:stun.l.google.com:19302")]
+
+    async def fetch_ice_config() -> List[IceServer]:
+        """Fetch the ICE configuration from the configured endpoint."""
+        session: aiohttp.ClientSession = GLOBALS["http_session"]
+        async with session.get(ICE_CONFIG_URL, timeout=aiohttp.ClientTimeout(total=60)) as resp:
+            if resp.status != 200:
+                raise HTTPException(status_code=500, detail="Failed to fetch ICE configuration.")
+
+            response_body = await resp.read()
+
+        # Malformed payloads raise ValueError (orjson.JSONDecodeError is one too), so callers
+        # can tell them apart from bugs in this code.
+        data = orjson.loads(response_body)
+        ice_config_data = data.get("iceConfig", {}) if isinstance(data, dict) else None
+        if not isinstance(ice_config_data, dict):
+            raise ValueError("expected a JSON object with an 'iceConfig' object")
+        ice_servers_data = ice_config_data.get("iceServers", [])
+        if not isinstance(ice_servers_data, list) or not all(
+            isinstance(server_data, dict) for server_data in ice_servers_data
+        ):
+            raise ValueError("expected 'iceServers' to be a list of objects")
+
+        return [
+            IceServer(
+                urls=server_data.get("urls", []),
+                username=server_data.get("username", ""),
+                credential=server_data.get("credential", ""),
+            )
+            for server_data in ice_servers_data
+        ]
+
+    def cached_ice_config() -> Optional[List[IceServer]]:
+        """Return the cached ICE configuration if it has not expired yet."""
+        if (
+            ice_servers_cache is not None
+            and time.monotonic() - ice_servers_cache_time < ICE_CONFIG_TTL
+        ):
+            return ice_servers_cache
+        return None
+
+    async def refresh_ice_config() -> List[IceServer]:
+        """Fetch the ICE configuration and cache it, falling back to the defaults on error."""
+        nonlocal ice_servers_cache, ice_servers_cache_time, ice_servers_inflight
+
+        try:
+            ice_servers = await fetch_ice_config()
+        except (aiohttp.ClientError, asyncio.TimeoutError, HTTPException) as e:
+            logger.error("Failed to fetch ICE configuration from {}: {}", ICE_CONFIG_URL, e)
+            return DEFAULT_ICE_SERVERS
+        except ValueError as e:
+            logger.error("Invalid ICE configuration from {}: {}", ICE_CONFIG_URL, e)
+            return DEFAULT_ICE_SERVERS
+        else:
+            ice_servers_cache = ice_servers
+            ice_servers_cache_time = time.monotonic()
+            return ice_servers
+        finally:
+            ice_servers_inflight = None
+
     async def get_ice_config() -> Optional[List[IceServer]]:
         """
-        Retrieves ICE configuration from the configured endpoint.
+        Retrieves ICE configuration, reusing the last fetched one for ICE_CONFIG_TTL seconds.
+
+        Concurrent callers that miss the cache all wait on the same fetch, so a burst of
+        offers results in a single request, and a single timeout if the endpoint is down.
 
         Returns:
             Optional[List[IceServer]]: Optional list containing ice_servers
         """
-        try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as session:
-                async with session.request(
-                    "GET",
-                    ICE_CONFIG_URL,
-                    headers=None,
-                    data=None,
-                ) as resp:
-                    if resp.status != 200:
-                        raise HTTPException(
-                            status_code=500, detail="Failed to fetch ICE configuration."
-                        )
-
-                    response_body = await resp.read()
-                    data = json.loads(response_body.decode("utf-8"))
-
-                    ice_config_data = data.get("iceConfig", {})
-                    ice_servers_data = ice_config_data.get("iceServers", [])
-
-                    ice_servers = []
-                    for server_data in ice_servers_data:
-                        ice_server = IceServer(
-                            urls=server_data.get("urls", []),
-                            username=server_data.get("username", ""),
-                            credential=server_data.get("credential", ""),
-                        )
-                        ice_servers.append(ice_server)
-
-                    return ice_servers
+        nonlocal ice_servers_inflight
 
-        except Exception as e:
-            logger.error(f"Failed to fetch ICE configuration from {ICE_CONFIG_URL}: {e}")
-            return [IceServer(urls="stun:stun.l.google.com:19302")]
+        ice_servers = cached_ice_config()
+        if ice_servers is not None:
+            return ice_servers
+
+        if ice_servers_inflight is None:
+            ice_servers_inflight = asyncio.create_task(refresh_ice_config())
+
+        # Shielded so a caller going away doesn't cancel the fetch for everyone else
+        return await asyncio.shield(ice_servers_inflight)
+
+    @asynccontextmanager
+    async def smallwebrtc_lifespan(app: FastAPI):
+        """Open the shared HTTP session and warm up the ICE configuration cache."""
+        async with http_session_lifespan(app):
+            # Fetched in the background so the first offer finds it cached, without holding
+            # up startup when the endpoint is slow.
+            prefetch = asyncio.create_task(get_ice_config())
+            try:
+                yield
+            finally:
+                prefetch.cancel()
+                if ice_servers_inflight is not None:
+                    ice_servers_inflight.cancel()
+
+    add_lifespan_to_app(smallwebrtc_lifespan)
+
+    async def read_offer_body(req: Request) -> bytearray:
+        """Read the offer body, refusing anything larger than MAX_OFFER_BODY_SIZE.
+
+        SDP offers are a few KB. The declared Content-Length is checked first, and the bytes
+        are counted as they arrive so chunked uploads are bounded too.
+        """
+        content_length = req.headers.get("content-length")
+        if content_length is not None:
+            if not content_length.isdigit():
+                raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+            if int(content_length) > MAX_OFFER_BODY_SIZE:
+                raise HTTPException(status_code=413, detail="Offer body too large")
+
+        body = bytearray()
+        async for chunk in req.stream():
+            body += chunk
+            if len(body) > MAX_OFFER_BODY_SIZE:
+                raise HTTPException(status_code=413, detail="Offer body too large")
+        return body
 
     @app.post("/api/offer")
     async def offer(
@@ -317,12 +465,24 @@ def setup_smallwebrtc_routes():
         x_daily_session_id: Annotated[str | None, Header()] = None,
     ):
         """Handle WebRTC offer requests via SmallWebRTCRequestHandler."""
-        # Updating the ice servers
-        ice_servers = await get_ice_config()
-        small_webrtc_handler._ice_servers = ice_servers
+        # The ICE configuration is usually cached. When it has to be refreshed, the fetch runs
+        # while the offer body is read and parsed instead of before it.
+        ice_servers = cached_ice_config()
+        ice_servers_task = None
+        if ice_servers is None:
+            ice_servers_task = asyncio.create_task(get_ice_config())
+        try:
+            body = orjson.loads(await read_offer_body(req))
+            request = SmallWebRTCRequest.from_dict(body)
+            if ice_servers_task is not None:
+                ice_servers = await ice_servers_task
+        finally:
+            if ice_servers_task is not None and not ice_servers_task.done():
+                ice_servers_task.cancel()
 
-        body = await req.json()
-        request = SmallWebRTCRequest.from_dict(body)
+        # Updating the ice servers, the cache hands back the same list until it expires
+        if small_webrtc_handler._ice_servers is not ice_servers:
+            small_webrtc_handler._ice_servers = ice_servers
 
         async def webrtc_connection_callback(connection):
             runner_args = SmallWebRTCSessionArguments(
@@ -337,7 +497,9 @@ def setup_smallwebrtc_routes():
             request=request,
             webrtc_connection_callback=webrtc_connection_callback,
         )
-        return answer
+        # Encode the SDP answer with orjson directly instead of going through FastAPI's
+        # jsonable_encoder and the stdlib JSON encoder.
+        return Response(content=orjson.dumps(answer), media_type="application/json")
 
     # Setup ICE candidate route if available
     if feature_manager.is_enabled(FeatureKeys.SMALLWEBRTC_PATCH):
@@ -346,7 +508,7 @@ def setup_smallwebrtc_routes():
         @app.patch("/api/offer")
         async def ice_candidate(request: SmallWebRTCPatchRequest):
             """Handle WebRTC new ice candidate requests."""
-            logger.debug(f"Received patch request: {request}")
+            logger.debug("Received patch request: {}", request)
             await small_webrtc_handler.handle_patch_request(request)
             return {"status": "success"}
 
@@ -377,26 +539,27 @@ def setup_whatsapp_routes(get_ice_config_func):
     async def whatsapp_lifespan(app: FastAPI):
         """Manage application lifespan and WhatsApp client resources."""
         nonlocal whatsapp_client
-        async with aiohttp.ClientSession() as session:
-            whatsapp_client = WhatsAppClient(
-                whatsapp_token=WHATSAPP_TOKEN,
-                phone_number_id=WHATSAPP_PHONE_NUMBER_ID,
-                whatsapp_secret=WHATSAPP_APP_SECRET,
-                session=session,
-            )
-            logger.info("WhatsApp client initialized successfully")
+        # Registered after smallwebrtc_lifespan, so the shared session is open for our
+        # whole lifetime, including cleanup.
+        whatsapp_client = WhatsAppClient(
+            whatsapp_token=WHATSAPP_TOKEN,
+            phone_number_id=WHATSAPP_PHONE_NUMBER_ID,
+            whatsapp_secret=WHATSAPP_APP_SECRET,
+            session=GLOBALS["http_session"],
+        )
+        logger.info("WhatsApp client initialized successfully")
 
-            try:
-                yield  # Run the application
-            finally:
-                # Cleanup WhatsApp client resources
-                if whatsapp_client:
-                    logger.info("Cleaning up WhatsApp client resources...")
-                    try:
-                        await whatsapp_client.terminate_all_calls()
-                        logger.info("WhatsApp client cleanup completed")
-                    except Exception as e:
-                        logger.error(f"Error during WhatsApp client cleanup: {e}")
+        try:
+            yield  # Run the application
+        finally:
+            # Cleanup WhatsApp client resources
+            if whatsapp_client:
+                logger.info("Cleaning up WhatsApp client resources...")
+                try:
+                    await whatsapp_client.terminate_all_calls()
+                    logger.info("WhatsApp client cleanup completed")
+                except Exception as e:
+                    logger.error(f"Error during WhatsApp client cleanup: {e}")
 
     # Add the WhatsApp lifespan to the app
     add_lifespan_to_app(whatsapp_lifespan)
@@ -405,9 +568,17 @@ def setup_whatsapp_routes(get_ice_config_func):
         "/whatsapp",
         summary="Handle WhatsApp webhook events",
         description="Processes incoming WhatsApp messages and call events",
+        # The body is read and parsed by hand, the model is only used to document it
+        openapi_extra={
+            "requestBody": {
+                "content": {
+                    "application/json": {"schema": add_model_schema_to_app(WhatsAppWebhookRequest)}
+                },
+                "required": True,
+            }
+        },
     )
     async def whatsapp_webhook(
-        body: WhatsAppWebhookRequest,
         background_tasks: BackgroundTasks,
         request: Request,
         x_hub_signature_256: str = Header(None),
@@ -420,7 +591,7 @@ def setup_whatsapp_routes(get_ice_config_func):
 
         Args:
             x_daily_session_id: Header parameter containing session ID
-            body: Parsed WhatsApp webhook request body
+            request: Incoming request, its raw body is also needed for signature checks
             background_tasks: FastAPI background tasks manager
 
         Returns:
@@ -431,12 +602,25 @@ def setup_whatsapp_routes(get_ice_config_func):
                 400 for invalid request format or object type
                 500 for internal processing errors
         """
+        # Read the body once: the raw bytes are needed for the signature check, and pydantic
+        # parses them straight into the model without building an intermediate dict.
+        raw_body = await request.body()
+        try:
+            body = WhatsAppWebhookRequest.model_validate_json(raw_body)
+        except ValidationError as e:
+            # Same error shape as FastAPI's own body validation
+            errors = [
+                {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+            ]
+            raise RequestValidationError(errors, body=raw_body) from e
+
         # Validate webhook object type
         if body.object != "whatsapp_business_account":
             logger.warning(f"Invalid webhook object type: {body.object}")
             raise HTTPException(status_code=400, detail="Invalid object type")
 
-        logger.debug(f"Processing WhatsApp webhook: {body}")
+        # Passed as an argument so the model's repr is only built when DEBUG is enabled
+        logger.debug("Processing WhatsApp webhook: {}", body)
 
         async def connection_callback(connection: SmallWebRTCConnection):
             runner_args = SmallWebRTCSessionArguments(
@@ -448,17 +632,17 @@ def setup_whatsapp_routes(get_ice_config_func):
             # Update ice servers if get_ice_config function is available
             if get_ice_config_func:
                 ice_servers = await get_ice_config_func()
-                whatsapp_client._ice_servers = ice_servers
+                if whatsapp_client._ice_servers is not ice_servers:
+                    whatsapp_client._ice_servers = ice_servers
 
             # Process the webhook request
-            raw_body = await request.body()
             result = await whatsapp_client.handle_webhook_request(
                 body,
                 connection_callback,
                 sha256_signature=x_hub_signature_256,
                 raw_body=raw_body,
             )
-            logger.debug(f"Webhook processed successfully: {result}")
+            logger.debug("Webhook processed successfully: {}", result)
             return {"status": "success", "message": "Webhook processed successfully"}
         except ValueError as ve:
             logger.warning(f"Invalid webhook request format: {ve}")
@@ -493,6 +677,11 @@ setup_smallwebrtc_routes()
 # Entrypoint
 # ------------------------------------------------------------
 if __name__ == "__main__":
+    # Everything loaded so far (pipecat, the bot and their dependencies) lives as long as the
+    # process. Freezing it keeps full collections during a session from walking those objects.
+    # Collect first so import-time garbage is freed rather than frozen for good.
+    gc.collect()
+    gc.freeze()
     try:
         server.run()
     except KeyboardInterrupt:
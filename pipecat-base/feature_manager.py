@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 
+import importlib.util
 import inspect
 from dataclasses import dataclass
 from enum import Enum
 from os import environ
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 from loguru import logger
 
@@ -16,6 +17,14 @@ class FeatureStatus(Enum):
     MISSING_CONFIG = "missing_config"
 
 
+STATUS_EMOJI = {
+    FeatureStatus.ENABLED: "✅",
+    FeatureStatus.DISABLED: "◻️",
+    FeatureStatus.ERROR: "❌",
+    FeatureStatus.MISSING_CONFIG: "⚠️",
+}
+
+
 class FeatureKeys(Enum):
     DAILY_TRANSPORT = "daily_transport"
     WEBSOCKET_TRANSPORT = "websocket_transport"
@@ -26,17 +35,13 @@ class FeatureKeys(Enum):
     OBSERVABILITY_OBSERVERS = "observability_observers"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FeatureInfo:
     name: str
     status: FeatureStatus
     version_required: str = ""
     error_message: str = ""
-    config_requirements: List[str] = None
-
-    def __post_init__(self):
-        if self.config_requirements is None:
-            self.config_requirements = []
+    config_requirements: Tuple[str, ...] = ()
 
 
 class FeatureManager:
@@ -58,8 +63,16 @@ class FeatureManager:
 
     def _detect_features(self):
         """Detect all available features and their status."""
-        self._detect_pipecatcloud_features()
-        self._detect_smallwebrtc_features()
+        if environ.get("PCC_CORE_ONLY", "False").lower() == "true":
+            # Skip probing (and importing) the optional transports entirely
+            reason = "Disabled by PCC_CORE_ONLY"
+            self._create_disabled_pipecatcloud_features(reason)
+            self._create_disabled_smallwebrtc_features(reason)
+            self._create_disabled_smallwebrtc_patch_features(reason)
+            self._create_disabled_whatsapp_feature(reason)
+        else:
+            self._detect_pipecatcloud_features()
+            self._detect_smallwebrtc_features()
         self._detect_observer_features()
 
     def _create_feature_info(
@@ -77,7 +90,7 @@ class FeatureManager:
             status=status,
             version_required=version_required,
             error_message=error_message,
-            config_requirements=config_requirements or [],
+            config_requirements=tuple(config_requirements or ()),
         )
 
     def _detect_pipecatcloud_features(self):
@@ -102,6 +115,20 @@ class FeatureManager:
                 error_message=str(e),
             )
 
+    def _create_disabled_pipecatcloud_features(self, reason: str):
+        """Create disabled PipecatCloud features when they are not wanted."""
+        feature_key = FeatureKeys.SMALL_WEBRTC_SESSION
+        feature_name = "SmallWebRTC Session Arguments"
+        version_required = "pipecatcloud>=0.2.5"
+
+        self.features[feature_key] = self._create_feature_info(
+            feature_key,
+            feature_name,
+            version_required,
+            status=FeatureStatus.DISABLED,
+            error_message=reason,
+        )
+
     def _detect_smallwebrtc_features(self):
         """Detect Pipecat AI features."""
         # Only enable pipecat features if small_webrtc_session is enabled
@@ -217,19 +244,16 @@ class FeatureManager:
             "WHATSAPP_APP_SECRET",
         ]
 
-        try:
-            from pipecat.transports.whatsapp.api import WhatsAppWebhookRequest
-            from pipecat.transports.whatsapp.client import WhatsAppClient
-
-            # Check if WhatsAppClient supports the secret parameter
-            signature = inspect.signature(WhatsAppClient)
-            if "whatsapp_secret" not in signature.parameters:
-                raise Exception("WhatsApp client doesn't support whatsapp_secret parameter")
-
-            # Check environment variables
-            missing_vars = [var for var in required_env_vars if not environ.get(var)]
+        # Check environment variables first: most deployments don't configure WhatsApp, and
+        # then it's enough to know the client is installed, without importing it.
+        missing_vars = [var for var in required_env_vars if not environ.get(var)]
 
+        try:
             if missing_vars:
+                client_module = "pipecat.transports.whatsapp.client"
+                if importlib.util.find_spec(client_module) is None:
+                    raise ImportError(f"No module named '{client_module}'")
+
                 self.features[feature_key] = self._create_feature_info(
                     feature_key,
                     feature_name,
@@ -238,13 +262,22 @@ class FeatureManager:
                     config_requirements=required_env_vars,
                     error_message=f"Missing environment variables: {', '.join(missing_vars)}",
                 )
-            else:
-                self.features[feature_key] = self._create_feature_info(
-                    feature_key,
-                    feature_name,
-                    version_required,
-                    config_requirements=required_env_vars,
-                )
+                return
+
+            from pipecat.transports.whatsapp.api import WhatsAppWebhookRequest
+            from pipecat.transports.whatsapp.client import WhatsAppClient
+
+            # Check if WhatsAppClient supports the secret parameter
+            signature = inspect.signature(WhatsAppClient)
+            if "whatsapp_secret" not in signature.parameters:
+                raise Exception("WhatsApp client doesn't support whatsapp_secret parameter")
+
+            self.features[feature_key] = self._create_feature_info(
+                feature_key,
+                feature_name,
+                version_required,
+                config_requirements=required_env_vars,
+            )
 
         except ImportError as e:
             self.features[feature_key] = self._create_feature_info(
@@ -311,12 +344,7 @@ class FeatureManager:
         logger.info("=" * 60)
 
         for feature_name, feature_info in self.features.items():
-            status_emoji = {
-                FeatureStatus.ENABLED: "✅",
-                FeatureStatus.DISABLED: "◻️",
-                FeatureStatus.ERROR: "❌",
-                FeatureStatus.MISSING_CONFIG: "⚠️",
-            }.get(feature_info.status, "❓")
+            status_emoji = STATUS_EMOJI.get(feature_info.status, "❓")
 
             logger.info(f"{status_emoji} {feature_info.name}: {feature_info.status.value.upper()}")
 
@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from loguru import logger
+from pydantic import BaseModel
 
 app = FastAPI()
 
@@ -27,3 +28,30 @@ def add_lifespan_to_app(new_lifespan):
     else:
         # No existing lifespan, use the new one
         app.router.lifespan_context = new_lifespan
+
+
+def add_model_schema_to_app(model: type[BaseModel]) -> dict:
+    """Add a model's JSON schema to the app's OpenAPI components.
+
+    Used to document request bodies that are parsed by hand. Nested models are added
+    alongside it so their refs resolve from the root of the OpenAPI document.
+
+    Args:
+        model: The pydantic model to document
+
+    Returns:
+        dict: A reference to the model's schema, for use in `openapi_extra`
+    """
+    schema = model.model_json_schema(ref_template="#/components/schemas/{model}")
+    schemas = schema.pop("$defs", {})
+    schemas[model.__name__] = schema
+    generate_openapi = app.openapi
+
+    def openapi():
+        if app.openapi_schema is None:
+            components = generate_openapi().setdefault("components", {})
+            components.setdefault("schemas", {}).update(schemas)
+        return app.openapi_schema
+
+    app.openapi = openapi
+    return {"$ref": f"#/components/schemas/{model.__name__}"}
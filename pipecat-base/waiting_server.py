@@ -8,6 +8,10 @@ from typing import List, Optional
 import uvicorn
 import uvicorn.server
 
+# Shared with the token refresher sidecar, which stops once the shutdown file appears
+TOKEN_REFRESHER_DIR = Path("/var/run/token-refresher")
+TOKEN_REFRESHER_SHUTDOWN_FILE = TOKEN_REFRESHER_DIR / "shutdown"
+
 
 class Config(uvicorn.Config):
     def __init__(self, should_exit_timeout: Optional[float] = None, *args, **kwargs) -> None:
@@ -23,9 +27,10 @@ class WaitingServer(uvicorn.server.Server):
     def shutdown_sidecar(self):
         logger = logging.getLogger("uvicorn.error")
         try:
-            if Path("/var/run/token-refresher").is_dir():
+            # Checked here rather than at startup, the sidecar may create it after we start
+            if TOKEN_REFRESHER_DIR.is_dir():
                 logger.info("Shutting down token refresher")
-                Path("/var/run/token-refresher/shutdown").touch()
+                TOKEN_REFRESHER_SHUTDOWN_FILE.touch()
         except Exception as e:
             logger.error("Error adding token refresher shutdown file: %s\n" % e)
 
@@ -33,9 +38,10 @@ class WaitingServer(uvicorn.server.Server):
         logger = logging.getLogger("uvicorn.error")
         self.shutdown_sidecar()
 
-        should_exit_deadline = None
+        # Monotonic, so a wall-clock adjustment can't cut the wait short or stretch it
+        should_exit_deadline = float("inf")
         if self.__config.should_exit_timeout is not None:
-            should_exit_deadline = time.time() + self.__config.should_exit_timeout
+            should_exit_deadline = time.monotonic() + self.__config.should_exit_timeout
 
         # Stop accepting new connections.
         for server in self.servers:
@@ -52,7 +58,7 @@ class WaitingServer(uvicorn.server.Server):
             while (
                 self.server_state.connections
                 and not self.force_exit
-                and (should_exit_deadline is None or time.time() < should_exit_deadline)
+                and time.monotonic() < should_exit_deadline
             ):
                 await asyncio.sleep(0.1)
 